@@ -1,96 +1,247 @@
-from flask import Flask, render_template_string, jsonify, request
+from flask import Flask, Response, jsonify, request
+import orjson
 import time
 import threading
+import queue
+from collections import deque
 import numpy as np
+from src.inference import FEATURE_ORDER, load_surrogate
+try:
+    # Ahead-of-time build (python compile_kernels.py): no JIT cost on cold start
+    from yacht_kernels import hull_profile, surrogate_kernel, decision_tier, telemetry_block
+except ImportError:
+    from src.kernels import hull_profile, surrogate_kernel, decision_tier, telemetry_block
 
 app = Flask(__name__)
 
 # --- [Engineering Logic: ML Surrogate Model] ---
-def surrogate_predict(params):
+# Piecewise-in-Fr surrogate distilled from the trained model by main.py (see src/train.py)
+SURROGATE_NORM, SURROGATE_KNOTS, SURROGATE_POWERS, SURROGATE_COEF = load_surrogate()
+# Position of each design parameter in the twin's state vector
+PARAM_INDEX = {k: i for i, k in enumerate(FEATURE_ORDER)}
+# Parameters whose change invalidates the precomputed hull profile
+HULL_PARAMS = frozenset(FEATURE_ORDER[:5])
+
+def surrogate_profile(params, out):
     """
-    Simulated ML Inference for Residuary Resistance (Rr).
-    Non-linear model based on Delft Systematic Yacht Hull Series.
+    Hull stage of the surrogate: writes log(Rr) at every Fr knot for the hull
+    of the [LC, PC, LD, BDr, LB, Fr] state vector into the preallocated out.
     """
-    # High-sensitivity to Froude Number (Wave-making resistance)
-    term_speed = params['fr']**3.5 * 220 
-    term_form = (params['pc'] * 1.5) + (params['ld'] * 0.5)
-    term_ratio = (params['lb'] * 0.3) + (params['bdr'] * 0.4)
-    term_buoyancy = abs(params['lc'] + 2.1) * 0.5
-    
-    # Stochastic output for simulation realism (Physical micro-noise)
-    prediction = term_speed + term_form + term_ratio + term_buoyancy
-    return round(prediction + np.random.normal(0, 0.005), 4)
+    lc, pc, ld, bdr, lb = params[:5].tolist()
+    hull_profile(lc, pc, ld, bdr, lb, SURROGATE_NORM, SURROGATE_POWERS, SURROGATE_COEF, out)
+
+def surrogate_predict(fr, profile):
+    """
+    ML Inference for Residuary Resistance (Rr) using the surrogate distilled
+    from the model trained on the Delft Systematic Yacht Hull Series.
+    Takes the Froude number and the hull profile from surrogate_profile.
+    """
+    return surrogate_kernel(fr, SURROGATE_KNOTS, profile)
+
+def _serialize_point(point):
+    """
+    Rounds raw telemetry floats for the JSON response only, keeping the
+    hot path free of rounding.
+    """
+    return {
+        "time": point["time"],
+        "rr": round(point["rr"], 4),
+        "carbon": round(point["carbon"], 3),
+        "recommendation": point["recommendation"],
+        "fr_val": round(point["fr_val"], 4)
+    }
 
 # --- [Decision Logic: 3-Tier Alert System] ---
+# Advisory messages indexed by tier: 0=STABLE, 1=OPTIMAL, 2=CAUTION, 3=CRITICAL
+DECISION_MESSAGES = (
+    "STABLE: Propulsion parameters within standard operating range.",
+    "OPTIMAL: System operating at peak efficiency. Low ESG impact.",
+    "CAUTION: Efficiency declining. Monitor fuel consumption and vibrations.",
+    "CRITICAL: High carbon intensity. Immediate speed reduction required."
+)
+
 def get_decision_logic(rr, carbon, fr):
     """
     Three-tier Engineering Alert System: Green (Stable) | Yellow (Caution) | Red (Critical)
+    Returns the integer tier alongside its message so clients can switch on the tier.
     """
-    if carbon > 30 or rr > 28:
-        return "CRITICAL: High carbon intensity. Immediate speed reduction required."
-    elif carbon > 22 or rr > 23:
-        return "CAUTION: Efficiency declining. Monitor fuel consumption and vibrations."
-    elif carbon < 12 and fr < 0.22:
-        return "OPTIMAL: System operating at peak efficiency. Low ESG impact."
-    else:
-        return "STABLE: Propulsion parameters within standard operating range."
+    tier = decision_tier(rr, carbon, fr)
+    return {"tier": tier, "msg": DECISION_MESSAGES[tier]}
+
+# --- [Serving: Thread and Stream Budget] ---
+# waitress worker threads; every open /api/stream pins one of them
+SERVER_THREADS = 16
+# Streams beyond this are refused with 503 (the page then polls /api/telemetry),
+# keeping threads free for the page itself and the JSON API
+MAX_STREAM_CLIENTS = SERVER_THREADS - 4
 
 class MarineDigitalTwin:
     def __init__(self):
         self.is_autoplay = False
-        self.params = {
-            'lc': -2.3, 'pc': 0.55, 'ld': 4.5, 'bdr': 3.2, 'lb': 2.8, 'fr': 0.30
-        }
+        # Contiguous [LC, PC, LD, BDr, LB, Fr] state vector, in FEATURE_ORDER
+        self.params = np.array([-2.3, 0.55, 4.5, 3.2, 2.8, 0.30])
         self.target_fr = 0.30 
-        self.history = []
+        # log(Rr) per Fr knot for the current hull, refreshed only on hull changes
+        self.profile = np.empty(len(SURROGATE_KNOTS))
+        surrogate_profile(self.params, self.profile)
+        # Guards params/profile/target_fr against concurrent request threads
+        self.lock = threading.RLock()
+        # (design tuple, response) of the last /api/update_params evaluation
+        self.last_eval = (None, None)
+        # Rolling 30-point window; appended only by the telemetry thread
+        self.history = deque(maxlen=30)
+        # (epoch second, formatted HH:MM:SS) so strftime runs at most once per second
+        self._ts_cache = (0, '')
+        # One bounded queue per /api/stream client, fed with newly produced points.
+        # The lock also covers history appends, so a subscriber's snapshot and its
+        # queue never both carry the same point
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
         
         # Start background IoT Telemetry thread
         threading.Thread(target=self._run_telemetry, daemon=True).start()
 
+    def _timestamp(self, t):
+        sec = int(t)
+        if sec != self._ts_cache[0]:
+            self._ts_cache = (sec, time.strftime('%H:%M:%S', time.localtime(sec)))
+        return self._ts_cache[1]
+
     def _run_telemetry(self):
         dt = 0.5; theta = 0.8; sigma = 0.006
+        max_ticks = 10
+        # Preallocated [Fr, Rr, carbon] rows and tiers filled by telemetry_block
+        block = np.empty((max_ticks, 3))
+        tiers = np.empty(max_ticks, dtype=np.int64)
+        last_tick = time.monotonic()
         while True:
+            now, wall = time.monotonic(), time.time()
             if self.is_autoplay:
-                drift = theta * (self.target_fr - self.params['fr']) * dt
-                diffusion = sigma * np.random.normal()
-                self.params['fr'] += (drift + diffusion)
-                self.params['fr'] = max(0.05, min(0.6, self.params['fr']))
-                
-                rr = surrogate_predict(self.params)
-                carbon = round(rr * self.params['fr'] * 2.5, 3)
-                recommendation = get_decision_logic(rr, carbon, self.params['fr'])
-                
-                data_point = {
-                    "time": time.strftime("%H:%M:%S"),
-                    "rr": rr,
-                    "carbon": carbon,
-                    "recommendation": recommendation,
-                    "fr_val": round(self.params['fr'], 4)
-                }
-                self.history.append(data_point)
-                if len(self.history) > 30: self.history.pop(0)
+                # Ticks missed while the thread was stalled are replayed in one native call
+                elapsed = int((now - last_tick) / dt)
+                n_ticks = min(max(elapsed, 1), max_ticks)
+                with self.lock:
+                    telemetry_block(self.params, self.target_fr, theta, sigma, dt,
+                                    SURROGATE_KNOTS, self.profile, block[:n_ticks], tiers[:n_ticks])
+
+                data_points = []
+                for k, ((fr, rr, carbon), tier) in enumerate(zip(block[:n_ticks].tolist(),
+                                                                 tiers[:n_ticks].tolist())):
+                    data_point = {
+                        # Replayed ticks are stamped at their own place on the dt grid
+                        "time": self._timestamp(wall - (n_ticks - 1 - k) * dt),
+                        "rr": rr,
+                        "carbon": carbon,
+                        "recommendation": {"tier": tier, "msg": DECISION_MESSAGES[tier]},
+                        "fr_val": fr
+                    }
+                    data_points.append(data_point)
+                self._publish(data_points)
+                # The fractional remainder of a stall carries over to the next wake-up;
+                # only a stall clamped at max_ticks is dropped
+                last_tick = now if elapsed > max_ticks else min(last_tick + n_ticks * dt, now)
+            else:
+                last_tick = now
             time.sleep(dt)
 
+    def subscribe(self):
+        """
+        Returns (queue, snapshot of the history window) taken atomically, or
+        (None, None) when MAX_STREAM_CLIENTS are already open.
+        """
+        q = queue.Queue(maxsize=64)
+        with self._subscribers_lock:
+            if len(self._subscribers) >= MAX_STREAM_CLIENTS:
+                return None, None
+            self._subscribers.append(q)
+            snapshot = list(self.history)
+        return q, snapshot
+
+    def unsubscribe(self, q):
+        with self._subscribers_lock:
+            self._subscribers.remove(q)
+
+    def _publish(self, data_points):
+        points = [_serialize_point(p) for p in data_points]
+        with self._subscribers_lock:
+            self.history.extend(data_points)
+            for q in self._subscribers:
+                try:
+                    q.put_nowait(points)
+                except queue.Full:
+                    pass  # Stalled client: drop rather than block the telemetry thread
+
 twin_system = MarineDigitalTwin()
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE, params=twin_system.params)
+    return Response(INDEX_HTML, mimetype='text/html')
 
 @app.route('/api/update_params', methods=['POST'])
 def update_params():
     new_data = request.json
-    twin_system.params.update(new_data)
-    if 'fr' in new_data: twin_system.target_fr = new_data['fr']
-    
-    rr = surrogate_predict(twin_system.params)
-    carbon = round(rr * twin_system.params['fr'] * 2.5, 3)
-    recommendation = get_decision_logic(rr, carbon, twin_system.params['fr'])
-    return jsonify({"rr": rr, "carbon": carbon, "recommendation": recommendation})
+    with twin_system.lock:
+        params = twin_system.params
+        # The slider posts every key: only values that actually differ are written,
+        # and the hull profile reruns only when one of them is a hull parameter
+        changed = {k: v for k, v in new_data.items() if k in PARAM_INDEX and params[PARAM_INDEX[k]] != v}
+        for k, v in changed.items():
+            params[PARAM_INDEX[k]] = v
+        if 'fr' in new_data: twin_system.target_fr = new_data['fr']
+        if not HULL_PARAMS.isdisjoint(changed):
+            surrogate_profile(params, twin_system.profile)
+
+        # Repeated posts with an unchanged design vector reuse the previous response
+        key = tuple(params.tolist())
+        if key == twin_system.last_eval[0]:
+            return jsonify(twin_system.last_eval[1])
+        fr = key[PARAM_INDEX['fr']]
+        rr = surrogate_predict(fr, twin_system.profile)
+
+    carbon = rr * fr * 2.5
+    recommendation = get_decision_logic(rr, carbon, fr)
+    result = {"rr": round(rr, 4), "carbon": round(carbon, 3), "recommendation": recommendation}
+    twin_system.last_eval = (key, result)
+    return jsonify(result)
 
 @app.route('/api/telemetry')
 def get_telemetry():
-    return jsonify(twin_system.history)
+    # list() snapshots the deque atomically under the GIL before iterating
+    points = [_serialize_point(p) for p in list(twin_system.history)]
+    return app.response_class(orjson.dumps(points), mimetype='application/json')
+
+@app.route('/api/stream')
+def stream_telemetry():
+    """
+    Server-Sent Events feed: sends the current window as a 'snapshot' event,
+    which replaces the client's buffer on every (re)connect, then pushes
+    only newly produced points. A client that falls behind receives its
+    backlog coalesced into a single event. Above MAX_STREAM_CLIENTS open
+    streams the request is refused with 503.
+    """
+    q, snapshot = twin_system.subscribe()
+    if q is None:
+        return Response("Stream capacity reached; poll /api/telemetry", status=503,
+                        headers={'Retry-After': '30'})
+
+    def event_stream():
+        yield (b"event: snapshot\ndata: " +
+               orjson.dumps([_serialize_point(p) for p in snapshot]) + b"\n\n")
+        while True:
+            try:
+                points = list(q.get(timeout=5))
+            except queue.Empty:
+                yield b": keep-alive\n\n"
+                continue
+            while not q.empty():
+                points.extend(q.get_nowait())
+            yield b"data: " + orjson.dumps(points) + b"\n\n"
+
+    response = Response(event_stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Released when the server closes the response, even if the stream never started
+    response.call_on_close(lambda: twin_system.unsubscribe(q))
+    return response
 
 @app.route('/api/toggle_system', methods=['POST'])
 def toggle_system():
@@ -238,7 +389,13 @@ HTML_TEMPLATE = """
             options: { indexAxis: 'y', plugins: { legend: { display: false } }, scales: { x: { display: false }, y: { ticks: { font: { size: 10 } } } } }
         });
 
+        // Trailing-edge debounce: a slider drag posts once per 16 ms frame at most
+        let syncTimer;
         function syncParams() {
+            clearTimeout(syncTimer); syncTimer = setTimeout(_syncParams, 16);
+        }
+
+        function _syncParams() {
             const payload = { lc: parseFloat(document.getElementById('lc').value), pc: parseFloat(document.getElementById('pc').value), ld: parseFloat(document.getElementById('ld').value), bdr: parseFloat(document.getElementById('bdr').value), lb: parseFloat(document.getElementById('lb').value), fr: parseFloat(document.getElementById('fr').value) };
             for(let k in payload) document.getElementById('v-'+k).innerText = payload[k];
             fetch('/api/update_params', { method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(payload) })
@@ -256,28 +413,65 @@ HTML_TEMPLATE = """
             });
         }
 
-        function updateDecisionUI(msg) {
+        // Tier -> highlight class: STABLE, OPTIMAL, CAUTION, CRITICAL
+        const TIER_CLASSES = ['highlight-green', 'highlight-green', 'highlight-yellow', 'highlight-red'];
+
+        function updateDecisionUI(d) {
             const box = document.getElementById('decision-text'); const content = document.getElementById('recommendation-content');
-            content.innerText = msg; box.classList.remove('highlight-red', 'highlight-yellow', 'highlight-green');
-            if(msg.includes('CRITICAL')) box.classList.add('highlight-red');
-            else if(msg.includes('CAUTION')) box.classList.add('highlight-yellow');
-            else if(msg.includes('OPTIMAL') || msg.includes('STABLE')) box.classList.add('highlight-green');
+            content.innerText = d.msg; box.classList.remove('highlight-red', 'highlight-yellow', 'highlight-green');
+            box.classList.add(TIER_CLASSES[d.tier]);
         }
 
-        setInterval(() => {
-            fetch('/api/telemetry').then(r => r.json()).then(data => {
-                if(data.length === 0) return; const latest = data[data.length - 1];
-                liveChart.data.labels = data.map(i => i.time); liveChart.data.datasets[0].data = data.map(i => i.rr); liveChart.update();
-                document.getElementById('rr-out').innerText = latest.rr; document.getElementById('co2-out').innerText = latest.carbon;
-                document.getElementById('v-fr').innerText = latest.fr_val; curRr = latest.rr; curFr = latest.fr_val;
-                updateDecisionUI(latest.recommendation);
-            });
-        }, 1000);
+        // The chart data arrays are the client-side rolling buffer fed by the SSE
+        // stream (server pushes only new points); DOM writes are coalesced per frame
+        const MAX_POINTS = 30;
+        let latestPoint = null; let framePending = false;
+
+        function scheduleRender() {
+            if(framePending || latestPoint === null) return;
+            framePending = true; requestAnimationFrame(renderTelemetry);
+        }
+
+        function renderTelemetry() {
+            framePending = false;
+            if(document.hidden) return;
+            liveChart.update('none');
+            const latest = latestPoint;
+            document.getElementById('rr-out').innerText = latest.rr; document.getElementById('co2-out').innerText = latest.carbon;
+            document.getElementById('v-fr').innerText = latest.fr_val; curRr = latest.rr; curFr = latest.fr_val;
+            updateDecisionUI(latest.recommendation);
+        }
+
+        function applyPoints(points, replace) {
+            const labels = liveChart.data.labels; const series = liveChart.data.datasets[0].data;
+            if(replace) { labels.length = 0; series.length = 0; }
+            for(const pt of points) { labels.push(pt.time); series.push(pt.rr); }
+            while(labels.length > MAX_POINTS) { labels.shift(); series.shift(); }
+            if(points.length === 0) { if(replace) liveChart.update('none'); return; }
+            latestPoint = points[points.length - 1];
+            scheduleRender();
+        }
+
+        const stream = new EventSource('/api/stream');
+        // Sent on every (re)connect: the server's window replaces the local buffer
+        stream.addEventListener('snapshot', (e) => applyPoints(JSON.parse(e.data), true));
+        stream.onmessage = (e) => applyPoints(JSON.parse(e.data), false);
+        // Refused (503 at the stream cap) or closed for good: poll the window instead
+        stream.onerror = () => {
+            if(stream.readyState !== EventSource.CLOSED) return;
+            setInterval(() => fetch('/api/telemetry').then(r => r.json()).then(points => applyPoints(points, true)), 1000);
+        };
+        // Repaint once when a background tab becomes visible again
+        document.addEventListener('visibilitychange', scheduleRender);
     </script>
 </body>
 </html>
 """
 
+# The page does not depend on request or twin state: compile and render it once
+INDEX_HTML = app.jinja_env.from_string(HTML_TEMPLATE).render()
+
 if __name__ == '__main__':
-    # Using Port 5001 to avoid AirPlay conflict on macOS
-    app.run(debug=True, port=5001, use_reloader=False)
\ No newline at end of file
+    from waitress import serve
+    # Using Port 5001 to avoid AirPlay conflict on macOS.
+    serve(app, port=5001, threads=SERVER_THREADS)
\ No newline at end of file
@@ -0,0 +1,21 @@
+from numba.pycc import CC
+from src.kernels import (PROFILE_SIG, SURROGATE_SIG, DECISION_SIG, TELEMETRY_SIG, BLOCK_SIG,
+                         hull_profile, surrogate_kernel, decision_tier, telemetry_tick,
+                         telemetry_block)
+
+def build_kernels(output_dir='.'):
+    """
+    Ahead-of-time Build: Compiles the Numba kernels into the yacht_kernels
+    C extension, so app.py starts without JIT compilation (or Numba itself).
+    """
+    cc = CC('yacht_kernels')
+    cc.output_dir = output_dir
+    cc.export('hull_profile', PROFILE_SIG)(hull_profile.py_func)
+    cc.export('surrogate_kernel', SURROGATE_SIG)(surrogate_kernel.py_func)
+    cc.export('decision_tier', DECISION_SIG)(decision_tier.py_func)
+    cc.export('telemetry_tick', TELEMETRY_SIG)(telemetry_tick.py_func)
+    cc.export('telemetry_block', BLOCK_SIG)(telemetry_block.py_func)
+    cc.compile()
+
+if __name__ == "__main__":
+    build_kernels()
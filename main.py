@@ -1,5 +1,12 @@
 from src.preprocess import prepare_data
-from src.train import run_grid_search, save_best_model
+from src.train import run_grid_search, select_best_model, distill_surrogate, save_artifacts
+
+# Largest mean absolute error (per Fr knot) tolerated between the served surrogate
+# and the trained model: SURROGATE_ATOL + SURROGATE_RTOL * mean Rr, as in np.allclose.
+# The absolute floor covers the sub-0.1 kN resistances of the slowest knots, where the
+# trained model itself is only accurate to a few hundredths of a kN.
+SURROGATE_RTOL = 0.10
+SURROGATE_ATOL = 0.05
 
 def run_pipeline():
     """
@@ -13,13 +20,28 @@ def run_pipeline():
     print("Data preprocessing completed.")
 
     # Step 2: Run Automated Hyper-parameter Optimization
-    print("Running Hyper-parameter Search (GridSearchCV)...")
-    models = run_grid_search(X_train, y_train, X_train_scaled)
+    print("Running Hyper-parameter Search (HalvingGridSearchCV)...")
+    models, cv_mse = run_grid_search(X_train, y_train, X_train_scaled)
+
+    # Step 3: Model Evaluation
+    best_model, test_mse = select_best_model(models, cv_mse, X_test, y_test)
+
+    # Step 4: Distill the best model into the piecewise-in-Fr surrogate served by app.py, gated on fidelity
+    surrogate, fidelity = distill_surrogate(best_model, X_train)
+    print("Surrogate distilled. Mean absolute error vs. best model per Fr:")
+    failed = []
+    for fr, (mae, mean_rr) in fidelity.items():
+        print(f"  Fr={fr:.3f}: {mae:.4f} kN ({mae / mean_rr:.2%} of mean Rr {mean_rr:.3f})")
+        if mae > SURROGATE_ATOL + SURROGATE_RTOL * mean_rr:
+            failed.append(f"{fr:.3f}")
+    if failed:
+        raise RuntimeError(f"Distilled surrogate exceeds the fidelity tolerance at Fr={', '.join(failed)}; "
+                           "not deploying it.")
 
-    # Step 3: Model Evaluation and Final Serialization
-    test_mse = save_best_model(models, X_test, X_test_scaled, y_test)
+    # Step 5: Serialization, only after the gate so a failing run leaves the deployed artifacts intact
+    save_artifacts(best_model, surrogate)
     print(f"Pipeline finished. Final Test MSE: {test_mse:.4f}")
-    print("Best model saved in /models folder.")
+    print("Best model and surrogate saved in /models folder.")
 
 if __name__ == "__main__":
     run_pipeline()
\ No newline at end of file
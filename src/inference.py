@@ -0,0 +1,60 @@
+import numpy as np
+
+# Column order of the surrogate input matrix (matches the training features)
+FEATURE_ORDER = ('lc', 'pc', 'ld', 'bdr', 'lb', 'fr')
+
+# PCG64 generator: faster than the legacy np.random.normal
+rng = np.random.default_rng()
+
+def surrogate_predict_batch(P, surrogate, noise_std=0.005):
+    """
+    Batched Surrogate Inference: Evaluates the distilled piecewise-in-Fr surrogate
+    for an (N, 6) float64 matrix of [LC, PC, LD, BDr, LB, Fr] rows in one vectorized pass.
+    """
+    norm, knots, powers, coef = surrogate
+    P = np.clip(P, norm[0], norm[1])
+    Z = scale_features(P[:, :5], norm[2, :5], norm[3, :5])
+    # log(Rr) of every row at every Fr knot: (N, terms) @ (terms, knots)
+    log_rr = np.prod(Z[:, None, :] ** powers[None, :, :], axis=2) @ coef.T
+
+    # Linear interpolation of log(Rr) between the bracketing knots
+    i = np.clip(np.searchsorted(knots, P[:, 5]) - 1, 0, len(knots) - 2)
+    w = (P[:, 5] - knots[i]) / (knots[i + 1] - knots[i])
+    rows = np.arange(P.shape[0])
+    rr = np.exp((1.0 - w) * log_rr[rows, i] + w * log_rr[rows, i + 1])
+    return np.maximum(rr + rng.normal(0, noise_std, P.shape[0]), 0.0)
+
+def load_scaler(path='models/scaler.npz'):
+    """
+    Scaler Loading: Returns the (mean, scale) vectors exported by prepare_data.
+    """
+    stats = np.load(path)
+    return stats['mean'], stats['scale']
+
+def scale_features(X, mean, scale):
+    """
+    Feature Standardization: Equivalent to StandardScaler.transform.
+    """
+    return (X - mean) / scale
+
+def pack_surrogate(lo, hi, knots, powers, coef, mean, scale):
+    """
+    Surrogate Packing: Returns (norm, knots, powers, coef) as contiguous arrays, where
+    norm stacks the clipping bounds and scaler statistics as rows [lo, hi, mean, scale],
+    and coef holds one row of hull-polynomial coefficients per Fr knot.
+    """
+    norm = np.ascontiguousarray(np.vstack([lo, hi, mean, scale]), dtype=np.float64)
+    knots = np.ascontiguousarray(knots, dtype=np.float64)
+    powers = np.ascontiguousarray(powers, dtype=np.int64)
+    coef = np.ascontiguousarray(coef, dtype=np.float64)
+    return norm, knots, powers, coef
+
+def load_surrogate(path='models/surrogate_poly.npz', scaler_path='models/scaler.npz'):
+    """
+    Distilled Surrogate Loading: Returns the packed (norm, knots, powers, coef)
+    arrays of the surrogate exported by main.py.
+    """
+    poly = np.load(path)
+    mean, scale = load_scaler(scaler_path)
+    return pack_surrogate(poly['lo'], poly['hi'], poly['knots'], poly['powers'], poly['coef'],
+                          mean, scale)
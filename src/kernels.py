@@ -0,0 +1,90 @@
+import math
+import numpy as np
+from numba import njit
+
+# Explicit signatures: compiled eagerly at import by the JIT, and reused by
+# compile_kernels.py for the ahead-of-time build of the yacht_kernels extension
+PROFILE_SIG = 'void(f8,f8,f8,f8,f8,f8[:,::1],i8[:,::1],f8[:,::1],f8[::1])'
+SURROGATE_SIG = 'f8(f8,f8[::1],f8[::1])'
+DECISION_SIG = 'i8(f8,f8,f8)'
+TELEMETRY_SIG = 'Tuple((f8,f8,i8))(f8[::1],f8,f8,f8,f8,f8[::1],f8[::1])'
+BLOCK_SIG = 'void(f8[::1],f8,f8,f8,f8,f8[::1],f8[::1],f8[:,::1],i8[::1])'
+
+@njit(PROFILE_SIG, cache=True, fastmath=True)
+def hull_profile(lc, pc, ld, bdr, lb, norm, powers, coef, out):
+    """
+    Hull stage of the distilled piecewise-in-Fr surrogate, rerun only when a hull
+    parameter changes: hull inputs are clipped to the distilled design space and
+    standardized, their powers are built once into a small table so every monomial
+    is a fixed 5-step product of table lookups, and log(Rr) of the hull polynomial
+    at every Fr knot is written into the caller-owned buffer out.
+    """
+    x = (lc, pc, ld, bdr, lb)
+    zp = np.empty((5, powers.max() + 1))
+    for j in range(5):
+        zj = (min(max(x[j], norm[0, j]), norm[1, j]) - norm[2, j]) / norm[3, j]
+        zp[j, 0] = 1.0
+        for k in range(1, zp.shape[1]):
+            zp[j, k] = zp[j, k - 1] * zj
+
+    out[:] = 0.0
+    for t in range(powers.shape[0]):
+        term = 1.0
+        for j in range(5):
+            term *= zp[j, powers[t, j]]
+        for k in range(out.shape[0]):
+            out[k] += coef[k, t] * term
+
+@njit(SURROGATE_SIG, cache=True, fastmath=True)
+def surrogate_kernel(fr, knots, profile):
+    """
+    Native inference kernel for the distilled surrogate: log(Rr) of the current
+    hull profile is interpolated linearly between the two bracketing Fr knots.
+    """
+    fr = min(max(fr, knots[0]), knots[-1])
+    i = min(max(np.searchsorted(knots, fr) - 1, 0), knots.shape[0] - 2)
+    w = (fr - knots[i]) / (knots[i + 1] - knots[i])
+    prediction = math.exp((1.0 - w) * profile[i] + w * profile[i + 1])
+
+    # Stochastic output for simulation realism (Physical micro-noise)
+    return max(0.0, prediction + np.random.normal(0, 0.005))
+
+@njit(DECISION_SIG, cache=True)
+def decision_tier(rr, carbon, fr):
+    """
+    Native tier classification: 0=STABLE, 1=OPTIMAL, 2=CAUTION, 3=CRITICAL.
+    """
+    return (3 if (carbon > 30 or rr > 28) else
+            2 if (carbon > 22 or rr > 23) else
+            1 if (carbon < 12 and fr < 0.22) else 0)
+
+@njit(TELEMETRY_SIG, cache=True, fastmath=True)
+def telemetry_tick(p, target, theta, sigma, dt, knots, profile):
+    """
+    One fused telemetry step on the [LC, PC, LD, BDr, LB, Fr] state vector:
+    OU update of the Froude number in place (mean reversion towards the target
+    plus Gaussian diffusion), then surrogate Rr from the precomputed hull
+    profile, carbon intensity and alert tier.
+    """
+    drift = theta * (target - p[5]) * dt
+    diffusion = sigma * np.random.normal()
+    fr = max(0.05, min(0.6, p[5] + drift + diffusion))
+    p[5] = fr
+
+    rr = surrogate_kernel(fr, knots, profile)
+    carbon = rr * fr * 2.5
+    return rr, carbon, decision_tier(rr, carbon, fr)
+
+@njit(BLOCK_SIG, cache=True, fastmath=True)
+def telemetry_block(p, target, theta, sigma, dt, knots, profile, out, tiers):
+    """
+    Block of len(tiers) consecutive telemetry steps in one native call, used to
+    replay the ticks missed while the telemetry thread was stalled: writes the
+    [Fr, Rr, carbon] of each step into the rows of out and its alert tier into tiers.
+    """
+    for k in range(tiers.shape[0]):
+        rr, carbon, tier = telemetry_tick(p, target, theta, sigma, dt, knots, profile)
+        out[k, 0] = p[5]
+        out[k, 1] = rr
+        out[k, 2] = carbon
+        tiers[k] = tier
@@ -1,7 +1,7 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-import joblib
+import numpy as np
 import os
 
 def prepare_data(file_path, test_size=0.2, random_state=42):
@@ -9,14 +9,17 @@ def prepare_data(file_path, test_size=0.2, random_state=42):
     Data Preprocessing: Handles data loading, feature engineering, 
     dataset splitting, and feature scaling.
     """
-    # 1. Load dataset
-    data = pd.read_csv(file_path)
+    # 1. Load dataset (multithreaded Arrow parser, parsed straight to float32)
+    columns = ['LC', 'PC', 'LD', 'BDr', 'LB', 'Fr', 'Rr']
+    data = pd.read_csv(file_path, engine='pyarrow', dtype={c: 'float32' for c in columns})
     
     # 2. Feature Selection: Define input features (X) and target variable (y)
     # Inputs: Longitudinal position, Prismatic coefficient, L/D ratio, etc.
-    X = data[['LC', 'PC', 'LD', 'BDr', 'LB', 'Fr']].values
+    # float32 end-to-end: the inputs carry ~3 significant figures, and halving
+    # the row width doubles what fits in cache for distance computations
+    X = data[['LC', 'PC', 'LD', 'BDr', 'LB', 'Fr']].values.astype(np.float32, copy=False)
     # Target: Residuary resistance
-    y = data['Rr'].values.reshape(-1, 1)
+    y = data['Rr'].values.astype(np.float32).reshape(-1, 1)
     
     # 3. Dataset Splitting: Segregate training and testing data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -28,8 +31,9 @@ def prepare_data(file_path, test_size=0.2, random_state=42):
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     
-    # 5. Scaler Persistence: Export scaler to ensure consistency during deployment
+    # 5. Scaler Persistence: Export only the fitted statistics so deployment
+    #    can standardize features without importing sklearn
     os.makedirs('models', exist_ok=True)
-    joblib.dump(scaler, 'models/feature_scaler.pkl')
+    np.savez('models/scaler.npz', mean=scaler.mean_, scale=scaler.scale_)
     
     return X_train, X_test, X_train_scaled, X_test_scaled, y_train.ravel(), y_test.ravel()
\ No newline at end of file
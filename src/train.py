@@ -1,51 +1,119 @@
+# Optional acceleration: Intel Extension for Scikit-learn swaps in oneDAL kernels
+# for KNN/SVR/RF. Must be patched before the sklearn estimators are imported.
+try:
+    from sklearnex import patch_sklearn
+    patch_sklearn()
+except ImportError:
+    pass
+
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.svm import SVR
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import GridSearchCV
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.base import clone
+from sklearn.preprocessing import PolynomialFeatures
+from sklearn.linear_model import Ridge
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
 from sklearn.metrics import mean_squared_error
+import numpy as np
 import joblib
+from src.inference import load_scaler, pack_surrogate, scale_features, surrogate_predict_batch
+
+def _tune(estimator, param_grid, X, y):
+    """
+    Successive-halving search without the implicit refit: the winning
+    configuration is refitted exactly once on the full training set.
+    """
+    search = HalvingGridSearchCV(estimator, param_grid, cv=5, scoring='neg_mean_squared_error',
+                                 n_jobs=-1, refit=False, verbose=0, random_state=42)
+    search.fit(X, y)
+    best = clone(estimator).set_params(**search.best_params_).fit(X, y)
+    return best, -search.best_score_
 
 def run_grid_search(X_train, y_train, X_train_scaled):
     """
-    Training Module: Performs benchmarking and Hyper-parameter tuning via GridSearchCV.
+    Training Module: Performs benchmarking and Hyper-parameter tuning via successive halving.
     """
     results = {}
+    cv_mse = {}
 
     # Algorithm 1: K-Nearest Neighbors (Requires scaled data)
-    knn = KNeighborsRegressor()
     knn_param_grid = {'n_neighbors': [3, 5, 7]}
-    knn_grid = GridSearchCV(knn, knn_param_grid, cv=5, scoring='neg_mean_squared_error', n_jobs=-1)
-    knn_grid.fit(X_train_scaled, y_train)
-    results['KNN'] = knn_grid.best_estimator_
-    print(f"KNN Best MSE: {-knn_grid.best_score_:.4f}")
+    results['KNN'], cv_mse['KNN'] = _tune(KNeighborsRegressor(), knn_param_grid, X_train_scaled, y_train)
+    print(f"KNN Best MSE: {cv_mse['KNN']:.4f}")
 
     # Algorithm 2: Support Vector Regression (Requires scaled data)
-    svr = SVR()
     svr_param_grid = {'kernel': ['linear', 'rbf'], 'C': [0.1, 1, 10]}
-    svr_grid = GridSearchCV(svr, svr_param_grid, cv=5, scoring='neg_mean_squared_error', n_jobs=-1)
-    svr_grid.fit(X_train_scaled, y_train)
-    results['SVR'] = svr_grid.best_estimator_
-    print(f"SVR Best MSE: {-svr_grid.best_score_:.4f}")
+    results['SVR'], cv_mse['SVR'] = _tune(SVR(), svr_param_grid, X_train_scaled, y_train)
+    print(f"SVR Best MSE: {cv_mse['SVR']:.4f}")
 
     # Algorithm 3: Random Forest (Scale-invariant, uses raw data)
-    rf = RandomForestRegressor(random_state=42)
     rf_param_grid = {'n_estimators': [100, 200], 'max_depth': [5, 10]}
-    rf_grid = GridSearchCV(rf, rf_param_grid, cv=5, scoring='neg_mean_squared_error', n_jobs=-1)
-    rf_grid.fit(X_train, y_train)
-    results['RF'] = rf_grid.best_estimator_
-    print(f"RF Best MSE: {-rf_grid.best_score_:.4f}")
+    results['RF'], cv_mse['RF'] = _tune(RandomForestRegressor(random_state=42), rf_param_grid, X_train, y_train)
+    print(f"RF Best MSE: {cv_mse['RF']:.4f}")
 
-    return results
+    # Algorithm 4: Histogram Gradient Boosting (Scale-invariant, uses raw data)
+    hgb = HistGradientBoostingRegressor(max_iter=200, max_depth=8, learning_rate=0.05, random_state=42)
+    hgb_param_grid = {'learning_rate': [0.05, 0.1], 'min_samples_leaf': [5, 20]}
+    results['HGB'], cv_mse['HGB'] = _tune(hgb, hgb_param_grid, X_train, y_train)
+    print(f"HGB Best MSE: {cv_mse['HGB']:.4f}")
 
-def save_best_model(models_dict, X_test, X_test_scaled, y_test):
+    return results, cv_mse
+
+def select_best_model(models_dict, cv_mse, X_test, y_test):
     """
-    Evaluation and Model Serialization.
+    Evaluation: Picks the production model and scores it on the test set.
     """
-    # Select best model (Random Forest selected based on baseline performance)
-    best_model = models_dict['RF']
+    # Select best model: lowest CV MSE among the raw-feature tree ensembles
+    # (HGB's histogram bins predict much faster than RF's deep tree walks)
+    best_name = min(('RF', 'HGB'), key=cv_mse.get)
+    best_model = models_dict[best_name]
+    print(f"Selected model: {best_name}")
     y_pred = best_model.predict(X_test)
     mse = mean_squared_error(y_test, y_pred)
-    
-    # Serialize the trained model for production use
-    joblib.dump(best_model, 'models/best_yacht_model.pkl')
-    return mse
\ No newline at end of file
+    return best_model, mse
+
+def distill_surrogate(model, X_train, samples_per_knot=2000, degree=3, random_state=42):
+    """
+    Surrogate Compilation: Fits the trained model piecewise in Fr. At every Froude
+    number of the training grid, a polynomial in the five standardized hull
+    parameters is fitted to log(Rr); the served surrogate interpolates log(Rr)
+    linearly between these knots and exponentiates, so Rr stays positive and
+    follows the steep growth of wave-making resistance with speed.
+    Nothing is written to disk: returns the surrogate arrays for save_artifacts
+    and {Fr: (MAE, mean Rr)} of the surrogate vs. the trained model per Fr knot.
+    """
+    # 1. Knots: the Froude numbers of the towing-tank grid
+    lo, hi = X_train.min(axis=0), X_train.max(axis=0)
+    knots = np.unique(X_train[:, 5])
+    mean, scale = load_scaler()
+    poly = PolynomialFeatures(degree).fit(np.zeros((1, 5)))
+    rng = np.random.default_rng(random_state)
+
+    # 2. Per knot: sample the hull design space and fit log(Rr) of the trained model
+    coef = np.empty((len(knots), poly.n_output_features_))
+    for k, fr in enumerate(knots):
+        hull = rng.uniform(lo[:5], hi[:5], size=(samples_per_knot, 5))
+        y = model.predict(np.column_stack([hull, np.full(samples_per_knot, fr)]))
+        Z = poly.transform(scale_features(hull, mean[:5], scale[:5]))
+        ridge = Ridge(alpha=1e-3).fit(Z, np.log(np.maximum(y, 1e-2)))
+        coef[k] = ridge.coef_
+        coef[k, 0] += ridge.intercept_  # powers_[0] is the constant monomial
+    surrogate = {'lo': lo, 'hi': hi, 'knots': knots, 'powers': poly.powers_, 'coef': coef}
+
+    # 3. Fidelity of the in-memory surrogate on the training hulls, per Fr knot
+    y_model = model.predict(X_train)
+    y_surrogate = surrogate_predict_batch(X_train, pack_surrogate(**surrogate, mean=mean, scale=scale),
+                                          noise_std=0.0)
+    abs_err = np.abs(y_surrogate - y_model)
+    fidelity = {float(fr): (float(abs_err[X_train[:, 5] == fr].mean()), float(y_model[X_train[:, 5] == fr].mean()))
+                for fr in knots}
+    return surrogate, fidelity
+
+def save_artifacts(model, surrogate):
+    """
+    Model Serialization: Writes the trained model and the surrogate arrays served
+    by app.py. Called only once the surrogate has passed the fidelity gate.
+    """
+    joblib.dump(model, 'models/best_yacht_model.pkl', compress=3)
+    np.savez('models/surrogate_poly.npz', **surrogate)